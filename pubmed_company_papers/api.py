@@ -1,16 +1,34 @@
 """
 Module for interacting with the PubMed API.
 """
-from typing import Dict, List, Optional, Union, Any
+from typing import Awaitable, Callable, Coroutine, Dict, Iterator, List, Optional, Tuple, TypeVar, Union, Any
+import asyncio
 import logging
+import os
+import threading
 import time
+import aiohttp
+import diskcache
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from urllib.parse import quote_plus
-from xml.etree import ElementTree as ET
+from urllib3.util.retry import Retry
+from .parser import PARSER_FINGERPRINT, ArticlePullParser, Element, PaperRecord, iter_articles
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Result type of the per-article callback passed to the batch fetchers
+T = TypeVar("T")
+
+# Where parsed records are cached between runs
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "pubmed_company_papers")
+
+# Returned by cache lookups for absent PMIDs, since None is a cached value
+_MISSING = object()
+
 class PubMedAPI:
     """Client for interacting with the PubMed API."""
     
@@ -19,17 +37,231 @@ class PubMedAPI:
     FETCH_URL = f"{BASE_URL}efetch.fcgi"
     SUMMARY_URL = f"{BASE_URL}esummary.fcgi"
     
-    def __init__(self, email: str = "user@example.com", tool: str = "pubmed-company-papers"):
+    # Maximum number of efetch requests in flight at once
+    MAX_CONCURRENCY = 10
+    
+    # Retry policy shared by the requests and aiohttp clients: throttling and
+    # transient server errors are retried with exponential backoff
+    RETRY_TOTAL = 3
+    RETRY_BACKOFF = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    # Bytes read from an efetch response before feeding them to the parser
+    FETCH_CHUNK_SIZE = 64 * 1024
+    
+    # Cached records expire after 30 days so corrected PubMed entries are picked up
+    CACHE_EXPIRE = 30 * 24 * 60 * 60
+    
+    def __init__(
+        self,
+        email: str = "user@example.com",
+        tool: str = "pubmed-company-papers",
+        api_key: Optional[str] = None,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR
+    ):
         """
         Initialize the PubMed API client.
         
         Args:
             email: Email to identify yourself to NCBI (recommended)
             tool: Name of your tool (recommended)
+            api_key: NCBI API key, raises the rate limit from 3 to 10 requests/second
+            cache_dir: Directory for the on-disk record cache, or None to disable it
         """
         self.email = email
         self.tool = tool
+        self.api_key = api_key
+        # NCBI allows 3 requests per second without an API key, 10 with one
+        self.rate_limit = 10 if api_key else 3
+        # Every request, sync or async, reserves the next free slot on one
+        # monotonic-clock schedule so the limit holds across all calls
+        self._min_interval = 1.0 / self.rate_limit
+        self._next_slot = 0.0
+        self._slot_lock = threading.Lock()
+        
+        # efetch XML compresses 5-10x, so always ask for gzip; both clients
+        # decompress on the fly, and fetched bodies are parsed chunk by chunk
+        self.headers = {
+            "Accept-Encoding": "gzip",
+            "User-Agent": f"{tool}/0.1.0"
+        }
+        
+        # One keep-alive session for all synchronous requests, retrying
+        # with the shared policy
+        retries = Retry(
+            total=self.RETRY_TOTAL,
+            backoff_factor=self.RETRY_BACKOFF,
+            status_forcelist=self.RETRY_STATUSES
+        )
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=retries)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Connection": "keep-alive", **self.headers})
+        
+        # Parsed records keyed by parser fingerprint and PMID; None marks
+        # papers without company authors
+        self.cache = diskcache.Cache(os.path.expanduser(cache_dir)) if cache_dir else None
+        
+    @staticmethod
+    def _cache_key(pmid: str) -> str:
+        """Cache key for a PMID, scoped to the current parser and keyword sets."""
+        return f"{PARSER_FINGERPRINT}:{pmid}"
+    
+    def lookup_cached(self, pmids: List[str]) -> Tuple[Dict[str, Optional[PaperRecord]], List[str]]:
+        """
+        Split PubMed IDs into those already in the cache and those still to fetch.
+        
+        Args:
+            pmids: List of PubMed IDs
+            
+        Returns:
+            Tuple of (cached results keyed by PMID, PMIDs missing from the cache)
+        """
+        if self.cache is None:
+            return {}, list(pmids)
+            
+        cached = {}
+        missing = []
+        for pmid in pmids:
+            # A single get, so an entry expiring between check and read cannot raise
+            record = self.cache.get(self._cache_key(pmid), default=_MISSING)
+            if record is _MISSING:
+                missing.append(pmid)
+            else:
+                cached[pmid] = record
+        
+        logger.debug(f"{len(cached)} of {len(pmids)} papers found in cache")
+        return cached, missing
+    
+    def store_cached(self, pmids: List[str], papers: List[PaperRecord]) -> None:
+        """
+        Cache the parse results for freshly fetched PubMed IDs.
+        
+        Args:
+            pmids: PubMed IDs that were fetched
+            papers: Records parsed from them; PMIDs without one are cached as None
+        """
+        if self.cache is None:
+            return
+            
+        papers_by_pmid = {paper.pubmed_id: paper for paper in papers}
+        for pmid in pmids:
+            self.cache.set(self._cache_key(pmid), papers_by_pmid.get(pmid), expire=self.CACHE_EXPIRE)
+        
+    def _reserve_slot(self) -> float:
+        """
+        Claim the next request slot allowed by the rate limit.
+        
+        Returns:
+            Seconds to wait before sending the request
+        """
+        with self._slot_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._min_interval
+        return slot - now
+    
+    def _throttle(self) -> None:
+        """Sleep until this synchronous request's rate-limit slot comes up."""
+        wait = self._reserve_slot()
+        if wait > 0:
+            time.sleep(wait)
+            
+    async def _athrottle(self) -> None:
+        """Wait, without blocking the event loop, for this request's rate-limit slot."""
+        wait = self._reserve_slot()
+        if wait > 0:
+            await asyncio.sleep(wait)
+            
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Seconds to back off before retrying a failed request.
+        
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+            retry_after: Retry-After header sent with the response, if any
+            
+        Returns:
+            The server's requested delay, or the exponential backoff
+        """
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.RETRY_BACKOFF * 2 ** attempt
+    
+    async def _aget(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        params: Dict[str, str],
+        consume: Callable[[aiohttp.ClientResponse], Awaitable[T]]
+    ) -> T:
+        """
+        Send a rate-limited GET request, retrying with the shared policy.
+        
+        Args:
+            session: Shared aiohttp session
+            url: E-utilities endpoint
+            params: Query parameters
+            consume: Reads the successful response; called afresh on every attempt
+            
+        Returns:
+            Whatever consume returns
+        """
+        for attempt in range(self.RETRY_TOTAL):
+            await self._athrottle()
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status not in self.RETRY_STATUSES:
+                        response.raise_for_status()
+                        return await consume(response)
+                    delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                    logger.warning(f"PubMed returned {response.status}, retrying in {delay:.1f}s")
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                delay = self._retry_delay(attempt)
+                logger.warning(f"Request to PubMed failed ({e!r}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            
+        # Retries are used up; the last attempt's errors reach the caller
+        await self._athrottle()
+        async with session.get(url, params=params) as response:
+            response.raise_for_status()
+            return await consume(response)
+            
+    @staticmethod
+    def _run(coro: Coroutine[Any, Any, T]) -> T:
+        """
+        Run a coroutine to completion from synchronous code.
         
+        asyncio.run cannot be called while an event loop is already running
+        in this thread (for example inside Jupyter), so in that case the
+        coroutine runs on its own loop in a worker thread instead. Async
+        callers should await afetch_all or asearch_all directly.
+        
+        Args:
+            coro: Coroutine to run
+            
+        Returns:
+            The coroutine's result
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+            
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+        
+    def _common_params(self) -> Dict[str, str]:
+        """Parameters sent with every E-utilities request."""
+        params = {
+            "tool": self.tool,
+            "email": self.email
+        }
+        if self.api_key:
+            params["api_key"] = self.api_key
+        return params
+    
     def search(self, query: str, retmax: int = 100, retstart: int = 0) -> List[str]:
         """
         Search PubMed for papers matching the query.
@@ -48,69 +280,231 @@ class PubMedAPI:
             "retmode": "json",
             "retmax": retmax,
             "retstart": retstart,
-            "tool": self.tool,
-            "email": self.email
+            **self._common_params()
         }
         
         logger.debug(f"Searching PubMed with query: {query}, start: {retstart}, max: {retmax}")
-        response = requests.get(self.SEARCH_URL, params=params)
+        self._throttle()
+        response = self.session.get(self.SEARCH_URL, params=params)
         response.raise_for_status()
         
-        data = response.json()
+        # orjson parses straight from the response bytes
+        data = orjson.loads(response.content)
         pmids = data.get("esearchresult", {}).get("idlist", [])
         logger.debug(f"Found {len(pmids)} papers matching the query (offset: {retstart})")
         
         return pmids
     
-    def fetch_papers(self, pmids: List[str]) -> Optional[ET.Element]:
+    def fetch_papers(self, pmids: List[str]) -> Iterator[Element]:
         """
         Fetch detailed information for the given PubMed IDs.
         
+        The response body is parsed while it downloads, so articles are
+        yielded as soon as they arrive and only one is held in memory.
+        
         Args:
             pmids: List of PubMed IDs to fetch
             
         Returns:
-            XML Element containing the paper data
+            Iterator over PubmedArticle elements
         """
         if not pmids:
             logger.warning("No PubMed IDs provided to fetch_papers")
-            return None
+            return
             
         params = {
             "db": "pubmed",
             "id": ",".join(pmids),
             "retmode": "xml",
-            "tool": self.tool,
-            "email": self.email
+            **self._common_params()
         }
         
         logger.debug(f"Fetching details for {len(pmids)} papers")
-        response = requests.get(self.FETCH_URL, params=params)
-        response.raise_for_status()
+        self._throttle()
+        with self.session.get(self.FETCH_URL, params=params, stream=True) as response:
+            response.raise_for_status()
+            # Let urllib3 undo any Content-Encoding before lxml sees the bytes
+            response.raw.decode_content = True
+            yield from iter_articles(response.raw)
+    
+    async def _bounded_search(
+        self,
+        sem: asyncio.Semaphore,
+        session: aiohttp.ClientSession,
+        query: str,
+        retmax: int,
+        retstart: int
+    ) -> List[str]:
+        """
+        Run one esearch page, respecting the concurrency and rate limits
+        and retrying throttled or failed requests.
+        
+        Args:
+            sem: Semaphore bounding the number of requests in flight
+            session: Shared aiohttp session
+            query: PubMed search query
+            retmax: Maximum number of results to return
+            retstart: Starting index for results
+            
+        Returns:
+            List of PubMed IDs on this page
+        """
+        params = {
+            "db": "pubmed",
+            "term": query,
+            "retmode": "json",
+            "retmax": str(retmax),
+            "retstart": str(retstart),
+            **self._common_params()
+        }
+        
+        async def read_json(response: aiohttp.ClientResponse) -> Dict[str, Any]:
+            return orjson.loads(await response.read())
+            
+        async with sem:
+            logger.debug(f"Searching PubMed with query: {query}, start: {retstart}, max: {retmax}")
+            data = await self._aget(session, self.SEARCH_URL, params, read_json)
         
-        # Parse XML response
-        xml_root = ET.fromstring(response.content)
-        return xml_root
+        pmids = data.get("esearchresult", {}).get("idlist", [])
+        logger.debug(f"Found {len(pmids)} papers matching the query (offset: {retstart})")
+        
+        return pmids
     
-    def batch_fetch_papers(self, pmids: List[str], batch_size: int = 200) -> List[ET.Element]:
+    async def asearch_all(self, query: str, pages: List[Tuple[int, int]]) -> List[List[str]]:
         """
-        Fetch papers in batches to avoid overwhelming the API.
+        Search several result pages concurrently.
+        
+        Args:
+            query: PubMed search query
+            pages: (retstart, retmax) pair for each page
+            
+        Returns:
+            List of PubMed ID lists, one per page, in input order
+        """
+        if not pages:
+            return []
+            
+        sem = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        
+        async with aiohttp.ClientSession(headers=self.headers) as session:
+            tasks = [
+                self._bounded_search(sem, session, query, retmax, retstart)
+                for retstart, retmax in pages
+            ]
+            return await asyncio.gather(*tasks)
+    
+    def search_pages(self, query: str, pages: List[Tuple[int, int]]) -> List[List[str]]:
+        """
+        Search several result pages at once instead of paging sequentially.
+        
+        Safe to call from code that already runs an event loop; see _run.
+        
+        Args:
+            query: PubMed search query
+            pages: (retstart, retmax) pair for each page
+            
+        Returns:
+            List of PubMed ID lists, one per page
+        """
+        return self._run(self.asearch_all(query, pages))
+    
+    async def _bounded_fetch(
+        self,
+        sem: asyncio.Semaphore,
+        session: aiohttp.ClientSession,
+        batch: List[str],
+        handle_article: Callable[[Element], T]
+    ) -> List[T]:
+        """
+        Fetch one batch of papers, respecting the concurrency and rate limits
+        and retrying throttled or failed requests.
+        
+        The response is parsed chunk by chunk as it downloads, and each
+        article is handed to handle_article as soon as it is complete, so
+        neither the body nor the parsed document is ever held in memory.
+        
+        Args:
+            sem: Semaphore bounding the number of requests in flight
+            session: Shared aiohttp session
+            batch: PubMed IDs to fetch in this request
+            handle_article: Called with each PubmedArticle element
+            
+        Returns:
+            Results of handle_article, one per article, in document order
+        """
+        params = {
+            "db": "pubmed",
+            "id": ",".join(batch),
+            "retmode": "xml",
+            **self._common_params()
+        }
+        
+        async def parse_stream(response: aiohttp.ClientResponse) -> List[T]:
+            # A fresh parser per attempt, so a retried response starts clean
+            results: List[T] = []
+            parser = ArticlePullParser()
+            async for chunk in response.content.iter_chunked(self.FETCH_CHUNK_SIZE):
+                results.extend(handle_article(article) for article in parser.feed(chunk))
+            results.extend(handle_article(article) for article in parser.close())
+            return results
+            
+        async with sem:
+            logger.debug(f"Fetching details for {len(batch)} papers")
+            return await self._aget(session, self.FETCH_URL, params, parse_stream)
+    
+    async def afetch_all(
+        self,
+        pmids: List[str],
+        handle_article: Callable[[Element], T],
+        batch_size: int = 200
+    ) -> List[T]:
+        """
+        Fetch papers concurrently in batches, parsing each as it streams in.
         
         Args:
             pmids: List of PubMed IDs to fetch
+            handle_article: Called with each PubmedArticle element, e.g. parse_article
             batch_size: Number of papers to fetch in each batch
             
         Returns:
-            List of XML Elements containing the paper data
+            Results of handle_article for every article, in input order
         """
-        results = []
+        if not pmids:
+            return []
+            
+        sem = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        
+        # aiohttp undoes the gzip Content-Encoding as each chunk is read, so
+        # the parser only ever sees one decompressed chunk at a time
+        async with aiohttp.ClientSession(headers=self.headers, auto_decompress=True) as session:
+            tasks = [
+                self._bounded_fetch(sem, session, pmids[i:i + batch_size], handle_article)
+                for i in range(0, len(pmids), batch_size)
+            ]
+            batches = await asyncio.gather(*tasks)
         
-        for i in range(0, len(pmids), batch_size):
-            batch = pmids[i:i + batch_size]
-            xml_result = self.fetch_papers(batch)
-            if xml_result is not None:
-                results.append(xml_result)
-            # Be nice to the API
-            time.sleep(0.5)
+        return [result for batch_results in batches for result in batch_results]
+    
+    def batch_fetch_papers(
+        self,
+        pmids: List[str],
+        handle_article: Callable[[Element], T],
+        batch_size: int = 200
+    ) -> List[T]:
+        """
+        Fetch papers in batches to avoid overwhelming the API.
+        
+        Batches are requested concurrently, throttled to NCBI's rate limit,
+        and every article is passed to handle_article while its response is
+        still downloading. Safe to call from code that already runs an event
+        loop; see _run.
+        
+        Args:
+            pmids: List of PubMed IDs to fetch
+            handle_article: Called with each PubmedArticle element, e.g. parse_article
+            batch_size: Number of papers to fetch in each batch
             
-        return results
\ No newline at end of file
+        Returns:
+            Results of handle_article for every article
+        """
+        return self._run(self.afetch_all(pmids, handle_article, batch_size))
\ No newline at end of file
@@ -10,9 +10,11 @@ from .main import get_papers_with_company_authors
 @click.command(context_settings=dict(help_option_names=['-h', '--help']))
 @click.argument('query')
 @click.option('-d', '--debug', is_flag=True, help='Print debug information during execution.')
-@click.option('-f', '--file', type=str, help='Specify the filename to save the results. If not provided, print to console.')
+@click.option('-f', '--file', type=str, help='Specify the filename to save the results (.csv or .parquet). If not provided, print to console.')
 @click.option('-m', '--max-results', type=int, default=100, help='Maximum number of results to process. Default is 100.')
-def main(query: str, debug: bool = False, file: Optional[str] = None, max_results: int = 100) -> None:
+@click.option('-k', '--api-key', type=str, envvar='NCBI_API_KEY', help='NCBI API key for a higher request rate. Defaults to $NCBI_API_KEY.')
+@click.option('--no-cache', is_flag=True, help='Ignore and do not update the on-disk cache of parsed papers.')
+def main(query: str, debug: bool = False, file: Optional[str] = None, max_results: int = 100, api_key: Optional[str] = None, no_cache: bool = False) -> None:
     """
     Fetch research papers based on a query and identify those with at least one author
     affiliated with a pharmaceutical or biotech company.
@@ -24,8 +26,14 @@ def main(query: str, debug: bool = False, file: Optional[str] = None, max_result
     """
     try:
         # Get papers with company authors
-        df = get_papers_with_company_authors(query, max_results=max_results, debug=debug)
+        result = get_papers_with_company_authors(query, max_results=max_results, debug=debug, api_key=api_key, use_cache=not no_cache, file=file)
         
+        # CSV and Parquet output is streamed to the file as papers are parsed
+        if isinstance(result, str):
+            click.echo(f"Results saved to {result}")
+            return
+        
+        df = result
         if df.empty:
             click.echo("No papers found with authors from pharmaceutical or biotech companies.")
             return
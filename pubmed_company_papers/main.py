@@ -1,20 +1,33 @@
 """
 Main module containing the core functionality to fetch and process papers.
 """
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Set, Union
 import logging
 import pandas as pd
-from .api import PubMedAPI
-from .parser import parse_papers, papers_to_dataframe
+from .api import DEFAULT_CACHE_DIR, PubMedAPI
+from .parser import PaperRecord, parse_article, papers_to_dataframe
+from .writer import PaperWriter, is_streamable
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Largest number of PMIDs requested per esearch page after the probe round
+SEARCH_PAGE_SIZE = 1000
+
+# Fewest PMIDs worth a follow-up search, however close the target is
+MIN_SEARCH_SIZE = 100
+
+# esearch only returns the first 10,000 results of a query
+MAX_SEARCH_DEPTH = 10000
+
 def get_papers_with_company_authors(
     query: str, 
     max_results: int = 100,
-    debug: bool = False
-) -> pd.DataFrame:
+    debug: bool = False,
+    api_key: Optional[str] = None,
+    use_cache: bool = True,
+    file: Optional[str] = None
+) -> Union[pd.DataFrame, str]:
     """
     Fetch papers matching the query and filter for those with authors 
     affiliated with pharmaceutical or biotech companies.
@@ -23,9 +36,15 @@ def get_papers_with_company_authors(
         query: PubMed search query
         max_results: Maximum number of results to return after filtering
         debug: Whether to print debug information
+        api_key: Optional NCBI API key for a higher request rate
+        use_cache: Whether to reuse records cached on disk by earlier runs
+        file: Optional .csv or .parquet path; papers are then streamed to it
+            batch by batch instead of being collected in memory
         
     Returns:
-        DataFrame containing the filtered papers
+        DataFrame containing the filtered papers, or the path written to
+        when streaming to a file. If no papers were found, an empty
+        DataFrame is returned and the file is left untouched.
     """
     # Configure logging based on debug flag
     log_level = logging.DEBUG if debug else logging.INFO
@@ -37,66 +56,108 @@ def get_papers_with_company_authors(
     logger.info(f"Starting search with query: {query}")
     
     # Initialize API client
-    api = PubMedAPI()
+    api = PubMedAPI(api_key=api_key, cache_dir=DEFAULT_CACHE_DIR if use_cache else None)
     
-    # Adaptive approach: start with batch size and increase if needed
+    # Adaptive approach: probe with one search, then plan the remaining rounds
     initial_batch_size = min(max_results * 3, 1000)  # Start with triple the requested size
     
+    # Stream straight to disk when the output format allows it; the file
+    # is only created once there is a paper to write
+    writer = PaperWriter(file) if file is not None and is_streamable(file) else None
+    
     try:
-        all_papers = []
-        current_batch_size = initial_batch_size
+        all_papers: List[PaperRecord] = []
+        found = 0
         total_fetched = 0
+        seen_pmids: Set[str] = set()
+        
+        # Cheap probe round to measure how many papers survive the filter
+        logger.info(f"Fetching batch of {initial_batch_size} papers (have 0 of {max_results} target)")
+        pages = [api.search(query, retmax=initial_batch_size, retstart=0)]
+        last_page_size = initial_batch_size
+        next_start = initial_batch_size
         
         # Continue fetching until we have enough papers or exhausted options
-        while len(all_papers) < max_results:
-            # Calculate how many more papers we need
-            papers_needed = max_results - len(all_papers)
-            
-            # Adjust batch size based on the filter rate from previous batches
-            if all_papers and total_fetched > 0:
-                # Calculate the filter rate (how many papers survive the filter)
-                filter_rate = len(all_papers) / total_fetched
-                # Adjust batch size based on the filter rate
-                adjusted_batch_size = min(int(papers_needed / max(filter_rate, 0.01)), 1000)
-                current_batch_size = max(adjusted_batch_size, 100)  # At least 100 papers
-            
-            logger.info(f"Fetching batch of {current_batch_size} papers (have {len(all_papers)} of {max_results} target)")
-            
-            # Search for papers with offset
-            pmids = api.search(query, retmax=current_batch_size, retstart=total_fetched)
+        while True:
+            # Flatten the pages, dropping PMIDs already processed
+            pmids = list(dict.fromkeys(
+                pmid for page in pages for pmid in page if pmid not in seen_pmids
+            ))
             
             if not pmids:
                 logger.warning("No more papers found matching the query")
                 break
                 
+            seen_pmids.update(pmids)
             total_fetched += len(pmids)
             
-            # Fetch paper details
-            xml_results = api.batch_fetch_papers(pmids)
+            # Only fetch papers not already parsed by an earlier run
+            cached, missing = api.lookup_cached(pmids)
             
-            # Parse papers and filter for company affiliations
-            batch_papers = parse_papers(xml_results)
+            # Fetch paper details, parsing and filtering each article for
+            # company affiliations as its response streams in
+            parsed = api.batch_fetch_papers(missing, parse_article)
+            fresh_papers = [paper for paper in parsed if paper is not None]
+            api.store_cached(missing, fresh_papers)
             
-            # Add to our collection
-            all_papers.extend(batch_papers)
+            # Merge cached and fresh records back into search order
+            fresh_by_pmid = {paper.pubmed_id: paper for paper in fresh_papers}
+            batch_papers = [
+                paper for paper in (cached.get(pmid) or fresh_by_pmid.get(pmid) for pmid in pmids)
+                if paper is not None
+            ]
+            
+            # Keep only as many papers as are still needed
+            batch_papers = batch_papers[:max_results - found]
+            found += len(batch_papers)
             
-            logger.info(f"After this batch: {len(all_papers)} papers with company affiliations out of {total_fetched} total fetched")
+            # Add to our collection
+            if writer is not None:
+                writer.write(batch_papers)
+            else:
+                all_papers.extend(batch_papers)
             
-            # If we fetched a batch but got no company papers, adjust batch size
-            if not batch_papers:
-                current_batch_size = min(current_batch_size * 2, 1000)
+            logger.info(f"After this batch: {found} papers with company affiliations out of {total_fetched} total fetched")
             
-            # If we've fetched a lot of papers but still don't have enough, we might need to stop
-            if total_fetched >= 10000 and len(all_papers) < max_results:
-                logger.warning(f"Stopping after fetching {total_fetched} papers, only found {len(all_papers)} with company affiliations")
+            if found >= max_results:
                 break
+                
+            # A short page means the search results are exhausted
+            if len(pages[-1]) < last_page_size:
+                logger.warning("No more papers found matching the query")
+                break
+                
+            # If we've searched as deep as esearch allows, we have to stop
+            if next_start >= MAX_SEARCH_DEPTH:
+                logger.warning(f"Stopping after fetching {total_fetched} papers, only found {found} with company affiliations")
+                break
+                
+            # Estimate how many more PMIDs are needed from the filter rate so far,
+            # never searching past the depth esearch allows
+            filter_rate = max(found / total_fetched, 0.01)
+            pmids_needed = int((max_results - found) / filter_rate)
+            to_request = min(max(pmids_needed, MIN_SEARCH_SIZE), MAX_SEARCH_DEPTH - next_start)
+            
+            # Split the estimate into full pages plus one sized to the remainder
+            page_specs = [
+                (retstart, min(SEARCH_PAGE_SIZE, next_start + to_request - retstart))
+                for retstart in range(next_start, next_start + to_request, SEARCH_PAGE_SIZE)
+            ]
+            
+            logger.info(f"Searching {len(page_specs)} pages for {to_request} papers concurrently (have {found} of {max_results} target)")
+            
+            # Issue all planned search rounds at once rather than one per round trip
+            pages = api.search_pages(query, page_specs)
+            last_page_size = page_specs[-1][1]
+            next_start += to_request
+            
+        logger.info(f"Final result: {found} papers with authors from companies out of {total_fetched} total papers fetched")
         
-        # Trim to max_results if we have more
-        if len(all_papers) > max_results:
-            all_papers = all_papers[:max_results]
-        
-        logger.info(f"Final result: {len(all_papers)} papers with authors from companies out of {total_fetched} total papers fetched")
-        
+        if writer is not None:
+            writer.close()
+            if writer.rows_written:
+                return writer.path
+                
         # Convert to DataFrame
         df = papers_to_dataframe(all_papers)
         
@@ -104,4 +165,9 @@ def get_papers_with_company_authors(
         
     except Exception as e:
         logger.error(f"Error fetching papers: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+        
+    finally:
+        # Removes partial output after a failure; a no-op once closed
+        if writer is not None:
+            writer.discard()
\ No newline at end of file
@@ -1,29 +1,126 @@
 """
 Module for parsing PubMed XML data and identifying company affiliations.
 """
-from typing import Dict, List, Optional, Tuple, Set, Any
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Set, Any, Union
+import hashlib
+import io
 import re
 import logging
-from xml.etree import ElementTree as ET
+from functools import lru_cache
+import ahocorasick
 import pandas as pd
 
+# lxml is preferred for speed; fall back to the stdlib parser, which
+# already uses the C accelerator on Python 3
+try:
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    from xml.etree import ElementTree as etree
+    HAS_LXML = False
+
+# Type of the parsed elements. Both backends share the ElementTree API the
+# parser relies on, so the stdlib class is what type checkers see
+if TYPE_CHECKING:
+    from xml.etree.ElementTree import Element
+elif HAS_LXML:
+    Element = etree._Element
+else:
+    Element = etree.Element
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Keywords indicating academic institutions
-ACADEMIC_KEYWORDS = {
+# Keywords indicating academic institutions. Frozen because they are
+# compiled into _KEYWORD_AUTOMATON at import and later edits would be ignored
+ACADEMIC_KEYWORDS = frozenset({
     "university", "college", "institute", "school", "academy", "facultad", "universität", 
     "université", "università", "academia", "medical center", "hospital", "clinic", 
     "medical school", "faculty", "department", "universitat"
-}
+})
 
 # Keywords indicating pharmaceutical or biotech companies
-COMPANY_KEYWORDS = {
+COMPANY_KEYWORDS = frozenset({
     "pharma", "therapeutics", "biotech", "bioscience", "biopharma", "laboratories",
     "labs", "inc", "llc", "ltd", "limited", "corp", "plc", "gmbh", "co", "ag", 
     "biomed", "genomics", "pharmaceuticals"
-}
+})
+
+# Output columns, in PaperRecord field order
+COLUMNS = (
+    "PubmedID", "Title", "Publication Date",
+    "Non-academic Author(s)", "Company Affiliation(s)",
+    "Corresponding Author Email"
+)
+
+class PaperRecord(NamedTuple):
+    """A paper with at least one company-affiliated author, one field per output column."""
+    pubmed_id: str
+    title: str
+    publication_date: str
+    non_academic_authors: str
+    company_affiliations: str
+    corresponding_email: str
+
+# Bump whenever parsing changes what a PaperRecord contains for the same XML
+PARSER_VERSION = 1
+
+def _parser_fingerprint() -> str:
+    """
+    Identify the parser version and keyword sets that produced a record.
+    
+    Returns:
+        Short hex digest that changes whenever either of them does
+    """
+    parts = [str(PARSER_VERSION), *sorted(ACADEMIC_KEYWORDS), "|", *sorted(COMPANY_KEYWORDS)]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:12]
+
+# Prefixed to cache keys so records parsed under other rules are never reused
+PARSER_FINGERPRINT = _parser_fingerprint()
+
+# Tags distinguishing the two keyword sets inside the shared automaton
+_ACADEMIC_TAG = "A"
+_COMPANY_TAG = "C"
 
+def _build_automaton() -> ahocorasick.Automaton:
+    """
+    Compile the academic and company keywords into one Aho-Corasick automaton.
+    
+    Each keyword maps to a (tag, keyword) tuple so a single pass over the text
+    reports hits from both sets.
+    
+    Returns:
+        Automaton matching every keyword in a single pass over the text
+    """
+    automaton = ahocorasick.Automaton()
+    for keyword in ACADEMIC_KEYWORDS:
+        automaton.add_word(keyword, (_ACADEMIC_TAG, keyword))
+    for keyword in COMPANY_KEYWORDS:
+        automaton.add_word(keyword, (_COMPANY_TAG, keyword))
+    automaton.make_automaton()
+    return automaton
+
+# Built once at import so each classification is a single scan of the text
+_KEYWORD_AUTOMATON = _build_automaton()
+
+# Company name patterns like "X, Inc." or "X Ltd."
+_COMPANY_RE = re.compile(r'([A-Za-z0-9\s\-]+)(?:\s+(?:Inc|LLC|Ltd|Limited|Corp|Corporation|GmbH|AG|Co|SA|BV|Pty)\.?)')
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Month and day spellings found in PubDate, mapped straight to zero-padded strings
+_MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_MONTH_MAP = (
+    {str(i): f"{i:02d}" for i in range(1, 13)}
+    | {f"{i:02d}": f"{i:02d}" for i in range(1, 13)}
+    | {name: f"{i:02d}" for i, name in enumerate(_MONTH_NAMES, start=1)}
+)
+_DAY_MAP = {str(i): f"{i:02d}" for i in range(1, 32)} | {f"{i:02d}": f"{i:02d}" for i in range(1, 32)}
+
+# Affiliation strings repeat heavily across authors and papers, so the pure
+# string helpers below are memoized
+_CACHE_SIZE = 100_000
+
+@lru_cache(maxsize=_CACHE_SIZE)
 def is_company_affiliation(affiliation: str) -> bool:
     """
     Determine if an affiliation is from a pharmaceutical or biotech company.
@@ -39,13 +136,17 @@ def is_company_affiliation(affiliation: str) -> bool:
         
     affiliation_lower = affiliation.lower()
     
-    # Check if this looks like an academic institution
-    if any(keyword in affiliation_lower for keyword in ACADEMIC_KEYWORDS):
-        return False
-        
-    # Check if this looks like a company
-    return any(keyword in affiliation_lower for keyword in COMPANY_KEYWORDS)
+    # Any academic keyword rules the affiliation out; otherwise it needs
+    # at least one company keyword
+    found_company = False
+    for _, (tag, _keyword) in _KEYWORD_AUTOMATON.iter(affiliation_lower):
+        if tag == _ACADEMIC_TAG:
+            return False
+        found_company = True
+    
+    return found_company
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def extract_company_name(affiliation: str) -> str:
     """
     Extract the company name from an affiliation string.
@@ -58,8 +159,7 @@ def extract_company_name(affiliation: str) -> str:
     """
     # Try to extract company name - this is a simple heuristic and may need refinement
     # First, try to find company patterns like "X, Inc." or "X Ltd."
-    company_pattern = re.compile(r'([A-Za-z0-9\s\-]+)(?:\s+(?:Inc|LLC|Ltd|Limited|Corp|Corporation|GmbH|AG|Co|SA|BV|Pty)\.?)')
-    match = company_pattern.search(affiliation)
+    match = _COMPANY_RE.search(affiliation)
     
     if match:
         return match.group(1).strip()
@@ -71,6 +171,7 @@ def extract_company_name(affiliation: str) -> str:
     
     return affiliation
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def extract_email(text: str) -> Optional[str]:
     """
     Extract an email address from text.
@@ -84,12 +185,11 @@ def extract_email(text: str) -> Optional[str]:
     if not text:
         return None
         
-    email_pattern = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
-    match = email_pattern.search(text)
+    match = _EMAIL_RE.search(text)
     
     return match.group(0) if match else None
 
-def parse_publication_date(date_elem: Optional[ET.Element]) -> str:
+def parse_publication_date(date_elem: Optional[Element]) -> str:
     """
     Parse a publication date element into a string.
     
@@ -109,125 +209,242 @@ def parse_publication_date(date_elem: Optional[ET.Element]) -> str:
     if not year:
         return ""
     
-    if month.isdigit():
-        month_int = int(month)
-        if 1 <= month_int <= 12:
-            month = month.zfill(2)
-        else:
-            month = "01"  # Default to January for invalid months
-    else:
-        # Try to convert month names to numbers
-        month_dict = {
-            "jan": "01", "feb": "02", "mar": "03", "apr": "04", "may": "05", "jun": "06",
-            "jul": "07", "aug": "08", "sep": "09", "oct": "10", "nov": "11", "dec": "12"
-        }
-        month_lower = month.lower()[:3]
-        month = month_dict.get(month_lower, "01")
+    # Numeric months are looked up as-is, names by their first three letters;
+    # anything unrecognised defaults to January / the first of the month
+    month_key = month if month.isdigit() else month.lower()[:3]
+    
+    return f"{year}-{_MONTH_MAP.get(month_key, '01')}-{_DAY_MAP.get(day, '01')}"
+
+def iter_articles(source: Union[bytes, Any]) -> Iterator[Element]:
+    """
+    Incrementally parse PubMed XML and yield one PubmedArticle element at a time.
+    
+    Each article is cleared (and detached from its preceding siblings) once the
+    caller moves on, so only a single article is held in memory at once.
     
-    if day.isdigit():
-        day = day.zfill(2)
-    else:
-        day = "01"  # Default to first day of month
+    Args:
+        source: Raw XML bytes or a binary file-like object
+        
+    Returns:
+        Iterator over PubmedArticle elements
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    
+    if not HAS_LXML:
+        yield from _iter_articles_stdlib(source)
+        return
     
-    return f"{year}-{month}-{day}"
+    for _, article_elem in etree.iterparse(source, events=("end",), tag="PubmedArticle", huge_tree=True):
+        yield article_elem
+        
+        # Release the parsed article and anything before it
+        article_elem.clear()
+        while article_elem.getprevious() is not None:
+            del article_elem.getparent()[0]
 
-def parse_papers(xml_elements: List[ET.Element]) -> List[Dict[str, Any]]:
+def _iter_articles_stdlib(source: Any) -> Iterator[Element]:
     """
-    Parse PubMed XML data into structured paper information.
-    Filter for papers with at least one author from a pharmaceutical or biotech company.
+    Stdlib ElementTree equivalent of iter_articles, used when lxml is missing.
+    
+    ElementTree has no tag filter or parent pointers, so the root element is
+    taken from the first start event and emptied after every article instead.
     
     Args:
-        xml_elements: List of XML elements containing paper data
+        source: Binary file-like object
         
     Returns:
-        List of dictionaries with structured paper information
+        Iterator over PubmedArticle elements
     """
-    papers = []
+    context = etree.iterparse(source, events=("start", "end"))
+    _, root = next(context)
     
-    for xml_root in xml_elements:
-        for article_elem in xml_root.findall(".//PubmedArticle"):
-            paper_data = {}
-            
-            # Extract PubMed ID
-            pmid_elem = article_elem.find(".//PMID")
-            if pmid_elem is None:
-                continue
-            paper_data["PubmedID"] = pmid_elem.text
+    for event, elem in context:
+        if event == "end" and elem.tag == "PubmedArticle":
+            yield elem
             
-            # Extract title
-            title_elem = article_elem.find(".//ArticleTitle")
-            paper_data["Title"] = title_elem.text if title_elem is not None else ""
-            
-            # Extract publication date
-            pub_date_elem = article_elem.find(".//PubDate")
-            paper_data["Publication Date"] = parse_publication_date(pub_date_elem)
-            
-            # Process authors
-            author_elems = article_elem.findall(".//Author")
-            non_academic_authors = []
-            company_affiliations = set()
-            corresponding_email = None
+            # Drop the processed article (and anything before it) from the tree
+            root.clear()
+
+class ArticlePullParser:
+    """
+    Incremental counterpart of iter_articles for XML that arrives in chunks.
+    
+    Feed it response chunks as they are downloaded; each call returns the
+    PubmedArticle elements completed so far. As with iter_articles, every
+    article is released once the caller moves on to the next one.
+    """
+    
+    def __init__(self):
+        if HAS_LXML:
+            self._parser = etree.XMLPullParser(events=("end",), tag="PubmedArticle", huge_tree=True)
+        else:
+            # ElementTree has no tag filter, and start events give us the root to clear
+            self._parser = etree.XMLPullParser(events=("start", "end"))
+        self._root = None
+        
+    def feed(self, data: bytes) -> Iterator[Element]:
+        """
+        Parse the next chunk of XML.
+        
+        Args:
+            data: Raw XML bytes
             
-            for author_elem in author_elems:
-                # Extract author name
-                last_name = author_elem.findtext("LastName") or ""
-                fore_name = author_elem.findtext("ForeName") or ""
-                author_name = f"{last_name}, {fore_name}".strip(", ")
-                
-                # Extract affiliations
-                affiliations = []
-                for aff_elem in author_elem.findall(".//Affiliation"):
-                    if aff_elem.text:
-                        affiliations.append(aff_elem.text)
-                
-                # Check if corresponding author
-                is_corresponding = False
-                for aut_note_elem in author_elem.findall(".//ELocationID[@EIdType='email']"):
-                    if aut_note_elem.text:
-                        is_corresponding = True
-                        corresponding_email = aut_note_elem.text
-                
-                # If no explicit email in XML, try to extract from affiliation text
-                if not corresponding_email and is_corresponding:
-                    for aff in affiliations:
-                        email = extract_email(aff)
-                        if email:
-                            corresponding_email = email
-                            break
+        Returns:
+            Iterator over the PubmedArticle elements completed by this chunk
+        """
+        self._parser.feed(data)
+        return self._read_articles()
+    
+    def close(self) -> Iterator[Element]:
+        """
+        Finish parsing once the whole document has been fed.
+        
+        Returns:
+            Iterator over any PubmedArticle elements still pending
+        """
+        self._parser.close()
+        return self._read_articles()
+    
+    def _read_articles(self) -> Iterator[Element]:
+        """Yield completed articles, releasing each one after it is processed."""
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                continue
+            if elem.tag != "PubmedArticle":
+                continue
                 
-                # Check if author is from a company
-                for affiliation in affiliations:
-                    if is_company_affiliation(affiliation):
-                        non_academic_authors.append(author_name)
-                        company_name = extract_company_name(affiliation)
-                        company_affiliations.add(company_name)
-                        break
+            yield elem
             
-            # Only include papers with at least one non-academic author
-            if non_academic_authors:
-                paper_data["Non-academic Author(s)"] = "; ".join(non_academic_authors)
-                paper_data["Company Affiliation(s)"] = "; ".join(company_affiliations)
-                paper_data["Corresponding Author Email"] = corresponding_email or ""
-                papers.append(paper_data)
+            # Release the parsed article and anything before it
+            if HAS_LXML:
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+            else:
+                self._root.clear()
+
+def parse_article(article_elem: Element) -> Optional[PaperRecord]:
+    """
+    Parse one PubmedArticle element into structured paper information.
+    
+    Args:
+        article_elem: PubmedArticle element
+        
+    Returns:
+        PaperRecord if at least one author is from a pharmaceutical or biotech
+        company, None otherwise
+    """
+    # Process authors
+    author_elems = article_elem.findall("MedlineCitation/Article/AuthorList/Author")
+    
+    # Extract affiliations
+    author_affiliations = [
+        [aff_elem.text for aff_elem in author_elem.findall("AffiliationInfo/Affiliation") if aff_elem.text]
+        for author_elem in author_elems
+    ]
+    
+    # Coauthors often share the same affiliation string, so classify each
+    # distinct one once: company affiliations map to their company name
+    company_names = {}
+    for affiliation in {aff for affiliations in author_affiliations for aff in affiliations}:
+        if is_company_affiliation(affiliation):
+            company_names[affiliation] = extract_company_name(affiliation)
+    
+    # Most papers have no company authors; skip them before extracting
+    # the remaining fields
+    if not company_names:
+        return None
+    
+    # Extract PubMed ID
+    pmid_elem = article_elem.find("MedlineCitation/PMID")
+    if pmid_elem is None:
+        return None
+    pmid = pmid_elem.text or ""
+    
+    # Extract title
+    title = article_elem.findtext("MedlineCitation/Article/ArticleTitle") or ""
+    
+    # Extract publication date
+    pub_date_elem = article_elem.find("MedlineCitation/Article/Journal/JournalIssue/PubDate")
+    pub_date = parse_publication_date(pub_date_elem)
+    
+    non_academic_authors = []
+    company_affiliations = set()
+    corresponding_email = None
+    
+    for author_elem, affiliations in zip(author_elems, author_affiliations):
+        # Extract author name
+        last_name = author_elem.findtext("LastName") or ""
+        fore_name = author_elem.findtext("ForeName") or ""
+        author_name = f"{last_name}, {fore_name}".strip(", ")
+        
+        # Check if corresponding author
+        is_corresponding = False
+        for aut_note_elem in author_elem.findall("ELocationID[@EIdType='email']"):
+            if aut_note_elem.text:
+                is_corresponding = True
+                corresponding_email = aut_note_elem.text
+        
+        # If no explicit email in XML, try to extract from affiliation text
+        if not corresponding_email and is_corresponding:
+            for aff in affiliations:
+                email = extract_email(aff)
+                if email:
+                    corresponding_email = email
+                    break
+        
+        # Check if author is from a company
+        for affiliation in affiliations:
+            if affiliation in company_names:
+                non_academic_authors.append(author_name)
+                company_affiliations.add(company_names[affiliation])
+                break
+    
+    # Only include papers with at least one non-academic author
+    if not non_academic_authors:
+        return None
+        
+    return PaperRecord(
+        pmid,
+        title,
+        pub_date,
+        "; ".join(non_academic_authors),
+        "; ".join(company_affiliations),
+        corresponding_email or ""
+    )
+
+def parse_papers(articles: Iterable[Element]) -> List[PaperRecord]:
+    """
+    Parse PubMed XML data into structured paper information.
+    Filter for papers with at least one author from a pharmaceutical or biotech company.
+    
+    Args:
+        articles: Iterable of PubmedArticle elements, e.g. from iter_articles
+        
+    Returns:
+        List of PaperRecord tuples with structured paper information
+    """
+    papers = []
+    
+    for article_elem in articles:
+        paper = parse_article(article_elem)
+        if paper is not None:
+            papers.append(paper)
     
     return papers
 
-def papers_to_dataframe(papers: List[Dict[str, Any]]) -> pd.DataFrame:
+def papers_to_dataframe(papers: List[PaperRecord]) -> pd.DataFrame:
     """
     Convert paper data to a pandas DataFrame.
     
     Args:
-        papers: List of dictionaries with paper information
+        papers: List of PaperRecord tuples with paper information
         
     Returns:
         DataFrame with paper information
     """
-    if not papers:
-        # Return empty DataFrame with the required columns
-        return pd.DataFrame(columns=[
-            "PubmedID", "Title", "Publication Date", 
-            "Non-academic Author(s)", "Company Affiliation(s)", 
-            "Corresponding Author Email"
-        ])
-    
-    return pd.DataFrame(papers)
\ No newline at end of file
+    # An empty list still yields the required columns
+    return pd.DataFrame.from_records(papers, columns=COLUMNS)
\ No newline at end of file
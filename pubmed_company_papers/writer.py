@@ -0,0 +1,101 @@
+"""
+Module for streaming paper records to CSV or Parquet files.
+"""
+from typing import Any, List, Optional
+import logging
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .parser import COLUMNS, PaperRecord, papers_to_dataframe
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Every Parquet column is a string
+SCHEMA = pa.schema([(column, pa.string()) for column in COLUMNS])
+
+# File types that can be written batch by batch
+STREAM_EXTENSIONS = (".csv", ".parquet")
+
+def is_streamable(path: Optional[str]) -> bool:
+    """
+    Check whether results for the given path can be streamed to disk.
+    
+    Args:
+        path: Output file name
+        
+    Returns:
+        True if the file is a CSV or Parquet file, False otherwise
+    """
+    return path is not None and path.lower().endswith(STREAM_EXTENSIONS)
+
+class PaperWriter:
+    """Writes batches of paper records to a CSV or Parquet file as they are parsed."""
+    
+    def __init__(self, path: str):
+        """
+        Prepare to write the output file.
+        
+        Nothing touches the disk until the first non-empty batch, which
+        goes to a temporary file beside path. close() moves it into place,
+        so an existing file is only replaced after a successful run.
+        
+        Args:
+            path: Output file name, ending in .csv or .parquet
+        """
+        self.path = path
+        self.rows_written = 0
+        self._parquet = path.lower().endswith(".parquet")
+        self._tmp_path = f"{path}.part"
+        self._writer: Optional[pq.ParquetWriter] = None
+        
+    def write(self, papers: List[PaperRecord]) -> None:
+        """
+        Append a batch of papers to the file.
+        
+        Args:
+            papers: List of PaperRecord tuples to write
+        """
+        if not papers:
+            return
+            
+        if self._parquet:
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._tmp_path, SCHEMA)
+            # Transpose the records into one Arrow array per column
+            arrays = [pa.array(values, type=pa.string()) for values in zip(*papers)]
+            self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=SCHEMA))
+        else:
+            # pandas keeps the same CSV dialect as a single df.to_csv call
+            first = self.rows_written == 0
+            papers_to_dataframe(papers).to_csv(
+                self._tmp_path, mode="w" if first else "a", header=first, index=False
+            )
+            
+        self.rows_written += len(papers)
+        logger.debug(f"Wrote {len(papers)} papers to {self._tmp_path}")
+        
+    def close(self) -> None:
+        """Flush the output and move it into place, if anything was written."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.rows_written:
+            os.replace(self._tmp_path, self.path)
+            
+    def discard(self) -> None:
+        """Drop any partial output, leaving an existing file at path untouched."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+            
+    def __enter__(self) -> "PaperWriter":
+        return self
+    
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
\ No newline at end of file
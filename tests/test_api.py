@@ -0,0 +1,48 @@
+"""
+Tests for the on-disk record cache of the PubMed API client.
+"""
+from pubmed_company_papers import api
+from pubmed_company_papers.api import PubMedAPI
+from pubmed_company_papers.parser import PaperRecord
+
+PAPER = PaperRecord(
+    pubmed_id="111",
+    title="Company paper one.",
+    publication_date="2024-03-05",
+    non_academic_authors="Smith, Jane",
+    company_affiliations="Genentech",
+    corresponding_email="jane@gene.com"
+)
+
+def test_cache_round_trip(tmp_path):
+    client = PubMedAPI(cache_dir=str(tmp_path))
+    client.store_cached(["111", "222"], [PAPER])
+    
+    cached, missing = client.lookup_cached(["111", "222", "333"])
+    
+    # PMIDs without company authors are cached as None, not reported missing
+    assert cached == {"111": PAPER, "222": None}
+    assert missing == ["333"]
+
+def test_cache_survives_new_client(tmp_path):
+    PubMedAPI(cache_dir=str(tmp_path)).store_cached(["111"], [PAPER])
+    
+    cached, missing = PubMedAPI(cache_dir=str(tmp_path)).lookup_cached(["111"])
+    
+    assert cached == {"111": PAPER}
+    assert missing == []
+
+def test_cache_ignores_other_parser_versions(tmp_path, monkeypatch):
+    PubMedAPI(cache_dir=str(tmp_path)).store_cached(["111"], [PAPER])
+    monkeypatch.setattr(api, "PARSER_FINGERPRINT", "changed")
+    
+    cached, missing = PubMedAPI(cache_dir=str(tmp_path)).lookup_cached(["111"])
+    
+    assert cached == {}
+    assert missing == ["111"]
+
+def test_cache_disabled():
+    client = PubMedAPI(cache_dir=None)
+    client.store_cached(["111"], [PAPER])
+    
+    assert client.lookup_cached(["111"]) == ({}, ["111"])
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Tests for streaming PubMed XML into paper records.
+"""
+from xml.etree import ElementTree
+
+import pytest
+
+from pubmed_company_papers import parser
+from pubmed_company_papers.parser import (
+    ArticlePullParser,
+    PaperRecord,
+    is_company_affiliation,
+    iter_articles,
+    parse_article,
+    parse_papers
+)
+
+XML = b"""<?xml version="1.0" ?>
+<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2025//EN" "https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_250101.dtd">
+<PubmedArticleSet>
+<PubmedArticle><MedlineCitation Status="MEDLINE"><PMID Version="1">111</PMID>
+<Article><Journal><JournalIssue><PubDate><Year>2024</Year><Month>Mar</Month><Day>5</Day></PubDate></JournalIssue></Journal>
+<ArticleTitle>Company paper.</ArticleTitle>
+<AuthorList>
+<Author><LastName>Smith</LastName><ForeName>Jane</ForeName><AffiliationInfo><Affiliation>Genentech Inc., South San Francisco, CA, USA.</Affiliation></AffiliationInfo></Author>
+<Author><LastName>Doe</LastName><ForeName>John</ForeName><AffiliationInfo><Affiliation>Department of Oncology, Harvard University, Boston, USA.</Affiliation></AffiliationInfo></Author>
+<Author><LastName>Roe</LastName><ForeName>Rich</ForeName><AffiliationInfo><Affiliation>Genentech Inc., South San Francisco, CA, USA.</Affiliation></AffiliationInfo><AffiliationInfo><Affiliation>Acme Therapeutics, Boston</Affiliation></AffiliationInfo></Author>
+</AuthorList></Article></MedlineCitation><PubmedData/></PubmedArticle>
+<PubmedArticle><MedlineCitation Status="MEDLINE"><PMID Version="1">222</PMID>
+<Article><Journal><JournalIssue><PubDate><Year>2023</Year><Month>11</Month></PubDate></JournalIssue></Journal>
+<ArticleTitle>Academic paper.</ArticleTitle>
+<AuthorList>
+<Author><LastName>Ng</LastName><ForeName>Amy</ForeName><AffiliationInfo><Affiliation>School of Medicine, Stanford</Affiliation></AffiliationInfo></Author>
+<Author><LastName>Po</LastName><ForeName>Li</ForeName><AffiliationInfo><Affiliation>Department of Chemistry, Pfizer Inc.</Affiliation></AffiliationInfo></Author>
+</AuthorList></Article></MedlineCitation></PubmedArticle>
+<PubmedArticle><MedlineCitation Status="MEDLINE"><PMID Version="1">333</PMID>
+<Article><Journal><JournalIssue><PubDate><Year>2022</Year><Month>07</Month><Day>09</Day></PubDate></JournalIssue></Journal>
+<ArticleTitle>Biotech paper.</ArticleTitle>
+<AuthorList>
+<Author><LastName>Lee</LastName><ForeName>Kim</ForeName><AffiliationInfo><Affiliation>Novartis Pharma AG, Basel</Affiliation></AffiliationInfo><ELocationID EIdType="email">kim.lee@novartis.com</ELocationID></Author>
+<Author><LastName>Kay</LastName><ForeName>Ola</ForeName></Author>
+</AuthorList></Article></MedlineCitation></PubmedArticle>
+<PubmedArticle><MedlineCitation Status="MEDLINE"><PMID Version="1">444</PMID>
+<Article><Journal><JournalIssue><PubDate><MedlineDate>2021 Spring</MedlineDate></PubDate></JournalIssue></Journal>
+<ArticleTitle/>
+<AuthorList>
+<Author><LastName>Cho</LastName><ForeName>Min</ForeName><AffiliationInfo><Affiliation>Moderna, Cambridge</Affiliation></AffiliationInfo></Author>
+<Author><LastName>Vu</LastName><ForeName>Tam</ForeName><AffiliationInfo><Affiliation>Genomics Labs Ltd, Leeds</Affiliation></AffiliationInfo></Author>
+</AuthorList></Article></MedlineCitation></PubmedArticle>
+</PubmedArticleSet>
+"""
+
+EXPECTED = [
+    PaperRecord("111", "Company paper.", "2024-03-05", "Smith, Jane; Roe, Rich", "Genentech", ""),
+    PaperRecord("333", "Biotech paper.", "2022-07-09", "Lee, Kim", "Novartis Pharma", "kim.lee@novartis.com"),
+    PaperRecord("444", "", "", "Vu, Tam", "Genomics Labs", "")
+]
+
+@pytest.fixture(params=["lxml", "stdlib"])
+def backend(request, monkeypatch):
+    """Run the test against lxml and against the stdlib ElementTree fallback."""
+    if request.param == "lxml":
+        lxml_etree = pytest.importorskip("lxml.etree")
+        monkeypatch.setattr(parser, "etree", lxml_etree)
+        monkeypatch.setattr(parser, "HAS_LXML", True)
+    else:
+        monkeypatch.setattr(parser, "etree", ElementTree)
+        monkeypatch.setattr(parser, "HAS_LXML", False)
+    return request.param
+
+def pull_parse(data: bytes, chunk_size: int):
+    """Feed data through ArticlePullParser in chunks, parsing articles as they complete."""
+    pull_parser = ArticlePullParser()
+    records = []
+    for i in range(0, len(data), chunk_size):
+        records.extend(parse_article(article) for article in pull_parser.feed(data[i:i + chunk_size]))
+    records.extend(parse_article(article) for article in pull_parser.close())
+    return [record for record in records if record is not None]
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 777, len(XML)])
+def test_pull_parser_across_chunk_boundaries(backend, chunk_size):
+    assert pull_parse(XML, chunk_size) == EXPECTED
+
+def test_pull_parser_yields_every_article(backend):
+    pull_parser = ArticlePullParser()
+    pmids = [article.findtext("MedlineCitation/PMID") for article in pull_parser.feed(XML)]
+    pmids += [article.findtext("MedlineCitation/PMID") for article in pull_parser.close()]
+    
+    assert pmids == ["111", "222", "333", "444"]
+
+def test_iter_articles_matches_pull_parser(backend):
+    assert parse_papers(iter_articles(XML)) == EXPECTED
+
+def test_many_articles(backend):
+    # Enough articles that both backends must release them between chunks
+    start = XML.index(b"<PubmedArticle>")
+    article = XML[start:XML.index(b"<PubmedArticle>", start + 1)]
+    articles = [article.replace(b">111<", f">{i}<".encode()) for i in range(2000)]
+    data = b"<PubmedArticleSet>" + b"".join(articles) + b"</PubmedArticleSet>"
+    
+    records = pull_parse(data, 777)
+    
+    assert [record.pubmed_id for record in records] == [str(i) for i in range(2000)]
+    assert parse_papers(iter_articles(data)) == records
+
+@pytest.mark.parametrize("affiliation, expected", [
+    ("Genentech Inc., South San Francisco, CA, USA.", True),
+    ("Novartis Pharma AG, Basel", True),
+    ("Genomics Labs Ltd, Leeds", True),
+    # Any academic keyword wins over company keywords
+    ("Department of Chemistry, Pfizer Inc.", False),
+    ("Amgen Therapeutics and Stanford University", False),
+    ("School of Medicine, Stanford", False),
+    # Keywords match case-insensitively
+    ("ACME BIOTECH", True),
+    # Neither kind of keyword
+    ("Moderna, Cambridge", False),
+    ("", False)
+])
+def test_is_company_affiliation(affiliation, expected):
+    assert is_company_affiliation(affiliation) is expected
\ No newline at end of file
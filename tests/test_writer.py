@@ -0,0 +1,97 @@
+"""
+Tests for streaming paper records to CSV and Parquet files.
+"""
+import os
+
+import pandas as pd
+
+from pubmed_company_papers.parser import PaperRecord, papers_to_dataframe
+from pubmed_company_papers.writer import PaperWriter, is_streamable
+
+FIRST_BATCH = [
+    PaperRecord("111", "Company paper.", "2024-03-05", "Smith, Jane; Roe, Rich", "Genentech", ""),
+    PaperRecord("222", "Quoted \"title\", with comma", "2023-11-01", "Lee, Kim", "Novartis Pharma", "kim@novartis.com")
+]
+SECOND_BATCH = [
+    PaperRecord("333", "Biotech paper.", "2022-07-09", "Vu, Tam", "Genomics Labs", "")
+]
+
+def test_is_streamable():
+    assert is_streamable("results.csv")
+    assert is_streamable("RESULTS.PARQUET")
+    assert not is_streamable("results.xlsx")
+    assert not is_streamable(None)
+
+def test_csv_matches_single_to_csv(tmp_path):
+    path = str(tmp_path / "results.csv")
+    
+    with PaperWriter(path) as writer:
+        writer.write(FIRST_BATCH)
+        writer.write([])
+        writer.write(SECOND_BATCH)
+        
+    with open(path, newline="") as f:
+        written = f.read()
+    assert written == papers_to_dataframe(FIRST_BATCH + SECOND_BATCH).to_csv(index=False)
+    assert writer.rows_written == 3
+    assert not os.path.exists(path + ".part")
+
+def test_parquet_batches(tmp_path):
+    path = str(tmp_path / "results.parquet")
+    
+    with PaperWriter(path) as writer:
+        writer.write(FIRST_BATCH)
+        writer.write(SECOND_BATCH)
+        
+    expected = papers_to_dataframe(FIRST_BATCH + SECOND_BATCH)
+    pd.testing.assert_frame_equal(pd.read_parquet(path), expected)
+    assert not os.path.exists(path + ".part")
+
+def test_target_untouched_until_close(tmp_path):
+    path = tmp_path / "results.csv"
+    path.write_text("old results\n")
+    
+    writer = PaperWriter(str(path))
+    writer.write(FIRST_BATCH)
+    
+    # Output goes to the .part file until the run finishes
+    assert path.read_text() == "old results\n"
+    assert os.path.exists(str(path) + ".part")
+    writer.close()
+    assert path.read_text() != "old results\n"
+
+def test_discard_keeps_existing_file(tmp_path):
+    for name in ("results.csv", "results.parquet"):
+        path = tmp_path / name
+        path.write_bytes(b"old results\n")
+        
+        writer = PaperWriter(str(path))
+        writer.write(FIRST_BATCH)
+        writer.discard()
+        
+        assert path.read_bytes() == b"old results\n"
+        assert not os.path.exists(str(path) + ".part")
+
+def test_error_in_context_discards(tmp_path):
+    path = tmp_path / "results.csv"
+    path.write_text("old results\n")
+    
+    try:
+        with PaperWriter(str(path)) as writer:
+            writer.write(FIRST_BATCH)
+            raise RuntimeError("search failed")
+    except RuntimeError:
+        pass
+        
+    assert path.read_text() == "old results\n"
+    assert not os.path.exists(str(path) + ".part")
+
+def test_no_rows_leaves_no_file(tmp_path):
+    path = tmp_path / "results.csv"
+    
+    with PaperWriter(str(path)) as writer:
+        writer.write([])
+        
+    assert writer.rows_written == 0
+    assert not path.exists()
+    assert not os.path.exists(str(path) + ".part")
\ No newline at end of file